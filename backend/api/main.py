@@ -1,11 +1,20 @@
 """Main FastAPI application."""
 import os
+import stat
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, Response
 from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
 from contextlib import asynccontextmanager
 from backend.config import settings
 from backend.models import db_manager
+from backend.services.extraction_service import extraction_service
+from backend.services.upload_service import progress_coalescer
+from ml.inference import llm_service
 
 
 @asynccontextmanager
@@ -20,13 +29,47 @@ async def lifespan(app: FastAPI):
     os.makedirs(settings.generated_questions_dir, exist_ok=True)
     os.makedirs(settings.model_cache_dir, exist_ok=True)
 
+    # Size the default executor used by asyncio.to_thread for file I/O
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4))
+    )
+
+    # Start worker processes for PDF extraction
+    extraction_service.start_pdf_pool()
+
     # Connect to database
     await db_manager.connect()
 
+    # Ensure indexes for hot lookups
+    db = db_manager.get_database()
+    await db.uploads.create_index("file_id", unique=True)
+    # get_questions sorts by _id; one index per type/difficulty filter
+    # combination returns the matches already in _id order (topic is a
+    # regex, so it's applied as a filter)
+    await db.questions.create_index([("type", 1), ("difficulty", 1), ("_id", 1)])
+    await db.questions.create_index([("type", 1), ("_id", 1)])
+    await db.questions.create_index([("difficulty", 1), ("_id", 1)])
+    await db.questions.create_index("topic")
+
+    # Batch progress writes during question generation
+    progress_coalescer.start()
+
+    # Connect to the task queue if configured
+    app.state.arq = None
+    if settings.redis_url:
+        from arq import create_pool
+        from arq.connections import RedisSettings
+        app.state.arq = await create_pool(RedisSettings.from_dsn(settings.redis_url))
+
     yield
 
     # Shutdown
     print("Shutting down QBank API...")
+    if app.state.arq is not None:
+        await app.state.arq.close()
+    await progress_coalescer.stop()
+    await llm_service.aclose()
+    extraction_service.shutdown_pdf_pool()
     await db_manager.disconnect()
 
 
@@ -48,6 +91,25 @@ app.add_middleware(
 )
 
 
+class APIGZipMiddleware(GZipMiddleware):
+    """
+    GZip for API responses only.
+
+    Generated question files are compressed once when written and served
+    precompressed, so the static mount bypasses on-the-fly compression.
+    """
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith("/generated_questions/"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Compress larger API responses (question lists, file listings)
+app.add_middleware(APIGZipMiddleware, minimum_size=1000, compresslevel=6)
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -76,5 +138,55 @@ app.include_router(upload.router, prefix="/api/upload", tags=["upload"])
 app.include_router(questions.router, prefix="/api/questions", tags=["questions"])
 app.include_router(process.router, prefix="/api/process", tags=["process"])
 
+def _accepts_gzip(scope) -> bool:
+    """Whether the request's Accept-Encoding allows gzip."""
+    for coding in Headers(scope=scope).get("accept-encoding", "").split(","):
+        name, *params = [part.strip() for part in coding.split(";")]
+        if name.lower() in ("gzip", "*"):
+            q = next((param[2:] for param in params if param.lower().startswith("q=")), "1")
+            try:
+                return float(q) > 0
+            except ValueError:
+                return False
+    return False
+
+
+class LargeChunkStaticFiles(StaticFiles):
+    """
+    Static files served in large read chunks.
+
+    Starlette streams files 64 KiB at a time with a threadpool hop per
+    chunk; generated question files go out in 1 MiB chunks instead.
+    Servers supporting the ASGI pathsend extension still get zero-copy.
+    Clients accepting gzip get the precompressed <file>.json.gz written
+    next to each questions file, when there is one.
+    """
+
+    async def get_response(self, path: str, scope) -> Response:
+        if path.endswith(".json") and scope["method"] in ("GET", "HEAD") and _accepts_gzip(scope):
+            full_path, stat_result = await asyncio.to_thread(self.lookup_path, f"{path}.gz")
+            if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+                response = self.file_response(full_path, stat_result, scope)
+                response.headers["Content-Encoding"] = "gzip"
+                response.headers["Content-Type"] = "application/json"
+                response.headers["Vary"] = "Accept-Encoding"
+                return response
+
+        response = await super().get_response(path, scope)
+        if path.endswith(".json"):
+            response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        if isinstance(response, FileResponse):
+            response.chunk_size = 1024 * 1024
+        return response
+
+
 # Mount static files for generated questions
-app.mount("/generated_questions", StaticFiles(directory="generated_questions"), name="generated_questions")
+app.mount(
+    "/generated_questions",
+    LargeChunkStaticFiles(directory=settings.generated_questions_dir),
+    name="generated_questions"
+)
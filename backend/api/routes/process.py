@@ -1,7 +1,7 @@
 """Processing API routes."""
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request, Depends
 from backend.models import (
-    ProcessingStatus,
+    UploadMetadata,
     ProcessingStatusResponse,
     GeneratedQuestionsResponse
 )
@@ -11,6 +11,16 @@ from backend.services.question_service import question_service
 
 router = APIRouter()
 
+# Status to progress message mapping
+_PROGRESS_MAP = {
+    "uploaded": "File uploaded, ready for processing",
+    "extracting": "Extracting text from PDF...",
+    "extracted": "Text extracted successfully",
+    "generating": "Generating questions using LLM...",
+    "ready": "Questions generated and ready for review",
+    "failed": "Processing failed"
+}
+
 
 @router.get("/status/{file_id}", response_model=ProcessingStatusResponse)
 async def get_processing_status(file_id: str):
@@ -24,20 +34,11 @@ async def get_processing_status(file_id: str):
         ProcessingStatusResponse with current status
     """
     try:
-        upload_metadata = await upload_service.get_upload_status(file_id)
-
-        # Map status to progress message
-        progress_map = {
-            "uploaded": "File uploaded, ready for processing",
-            "extracting": "Extracting text from PDF...",
-            "extracted": "Text extracted successfully",
-            "generating": "Generating questions using LLM...",
-            "ready": "Questions generated and ready for review",
-            "failed": "Processing failed"
-        }
+        # Polled frequently by the UI, so served from a short-lived cache
+        upload_metadata = await upload_service.get_cached_upload_status(file_id)
 
         # Use custom progress message if available, otherwise use status-based message
-        progress_message = upload_metadata.progress_message if upload_metadata.progress_message else progress_map.get(upload_metadata.status, "Unknown status")
+        progress_message = upload_metadata.progress_message if upload_metadata.progress_message else _PROGRESS_MAP.get(upload_metadata.status, "Unknown status")
 
         # Add progress percentage if generating
         if upload_metadata.status == "generating" and upload_metadata.progress_total > 0:
@@ -61,23 +62,29 @@ async def get_processing_status(file_id: str):
 
 
 @router.post("/extract/{file_id}")
-async def extract_text(file_id: str, background_tasks: BackgroundTasks):
+async def extract_text(
+    file_id: str,
+    background_tasks: BackgroundTasks,
+    upload_metadata: UploadMetadata = Depends(upload_service.get_upload_status)
+):
     """
     Extract text from uploaded PDF.
 
     Args:
         file_id: Unique file identifier
         background_tasks: FastAPI background tasks
+        upload_metadata: Upload metadata (404 if the file does not exist)
 
     Returns:
         Status message
     """
     try:
-        # Check if file exists
-        await upload_service.get_upload_status(file_id)
-
         # Run extraction in background
-        background_tasks.add_task(extraction_service.extract_text_from_pdf, file_id)
+        background_tasks.add_task(
+            extraction_service.extract_text_from_pdf,
+            file_id,
+            upload_metadata
+        )
 
         return {
             "message": "Text extraction started",
@@ -94,29 +101,31 @@ async def extract_text(file_id: str, background_tasks: BackgroundTasks):
 
 
 @router.post("/generate/{file_id}", response_model=GeneratedQuestionsResponse)
-async def generate_questions(file_id: str, background_tasks: BackgroundTasks):
+async def generate_questions(
+    file_id: str,
+    background_tasks: BackgroundTasks,
+    upload_metadata: UploadMetadata = Depends(upload_service.get_upload_status)
+):
     """
     Generate questions from extracted text.
 
     Args:
         file_id: Unique file identifier
         background_tasks: FastAPI background tasks
+        upload_metadata: Upload metadata (404 if the file does not exist)
 
     Returns:
         Status message (actual generation happens in background)
     """
     try:
-        # Check if file exists
-        await upload_service.get_upload_status(file_id)
-
         # Check if questions already generated
-        existing_questions = await question_service.get_generated_questions(file_id)
+        existing_questions = await question_service.get_generated_questions(file_id, upload_metadata)
         if existing_questions:
             return existing_questions
 
         # Run generation in background and return immediately
         # For synchronous response, we'll call it directly
-        result = await question_service.generate_questions_from_file(file_id)
+        result = await question_service.generate_questions_from_file(file_id, upload_metadata)
         return result
 
     except HTTPException:
@@ -158,41 +167,32 @@ async def get_generated_questions(file_id: str):
         )
 
 
-async def _run_pipeline_task(file_id: str):
-    """Background task to run the full pipeline."""
-    try:
-        # Extract text
-        await extraction_service.extract_text_from_pdf(file_id)
-
-        # Generate questions
-        await question_service.generate_questions_from_file(file_id)
-    except Exception as e:
-        # Update status to failed
-        await upload_service.update_status(
-            file_id,
-            ProcessingStatus.FAILED,
-            error=str(e)
-        )
-
-
 @router.post("/full-pipeline/{file_id}")
-async def run_full_pipeline(file_id: str, background_tasks: BackgroundTasks):
+async def run_full_pipeline(
+    file_id: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    upload_metadata: UploadMetadata = Depends(upload_service.get_upload_status)
+):
     """
     Run the full pipeline: extract text and generate questions.
 
     Args:
         file_id: Unique file identifier
+        request: Incoming request (used to reach the task queue)
         background_tasks: FastAPI background tasks
+        upload_metadata: Upload metadata (404 if the file does not exist)
 
     Returns:
         Status message (processing happens in background)
     """
     try:
-        # Check if file exists
-        await upload_service.get_upload_status(file_id)
-
-        # Run pipeline in background
-        background_tasks.add_task(_run_pipeline_task, file_id)
+        # Hand off to the worker queue if configured, otherwise run in-process
+        arq_pool = request.app.state.arq
+        if arq_pool is not None:
+            await arq_pool.enqueue_job("run_pipeline", file_id)
+        else:
+            background_tasks.add_task(question_service.run_pipeline, file_id, upload_metadata)
 
         return {
             "message": "Pipeline started",
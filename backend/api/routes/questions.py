@@ -1,6 +1,7 @@
 """Questions API routes."""
 from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
+from bson import ObjectId
 from backend.models import (
     Question,
     QuestionUpdate,
@@ -18,7 +19,9 @@ async def get_questions(
     limit: int = Query(100, ge=1, le=500),
     question_type: Optional[str] = None,
     difficulty: Optional[str] = None,
-    topic: Optional[str] = None
+    topic: Optional[str] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = Query(None)
 ):
     """
     Get questions from database with optional filters.
@@ -29,17 +32,27 @@ async def get_questions(
         question_type: Filter by question type (mcq, fill_in_blank, true_false)
         difficulty: Filter by difficulty (easy, medium, hard)
         topic: Filter by topic (partial match)
+        cursor: ID of the last question from the previous page (replaces skip)
+        fields: Fields to return, e.g. ?fields=question&fields=topic (all when omitted)
 
     Returns:
         List of questions
     """
+    if cursor and not ObjectId.is_valid(cursor):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid cursor: {cursor}"
+        )
+
     try:
         questions = await question_service.get_questions(
             skip=skip,
             limit=limit,
             question_type=question_type,
             difficulty=difficulty,
-            topic=topic
+            topic=topic,
+            cursor=cursor,
+            fields=fields
         )
         return questions
     except Exception as e:
@@ -83,8 +96,8 @@ async def update_question(question_id: str, updates: QuestionUpdate):
     Returns:
         Updated question
     """
-    # Filter out None values
-    update_data = {k: v for k, v in updates.dict().items() if v is not None}
+    # Only apply fields the client actually sent
+    update_data = updates.model_dump(exclude_none=True, exclude_unset=True)
 
     if not update_data:
         raise HTTPException(
@@ -1,15 +1,31 @@
 """Upload API routes."""
 import os
-import json
+import asyncio
+import orjson
 from typing import List
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Response
 from backend.models import UploadResponse
-from backend.services.upload_service import upload_service
+from backend.services.upload_service import upload_service, file_list_cache
+from backend.services import fast_io
 from backend.config import settings
 
 router = APIRouter()
 
 
+def _read_question_count(file_path: str) -> int:
+    """
+    Read the number of questions in a generated questions file.
+
+    Args:
+        file_path: Path to generated questions JSON file
+
+    Returns:
+        Number of questions in the file
+    """
+    data = fast_io.load_json(file_path)
+    return len(data.get('questions', []))
+
+
 @router.post("/", response_model=UploadResponse)
 async def upload_pdf(file: UploadFile = File(...)):
     """
@@ -38,53 +54,97 @@ async def list_files():
     """
     List all uploaded files with their question counts.
 
+    Results are serialized once with orjson and the encoded body is cached
+    briefly. The cache is tied to the generated questions directory's
+    mtime, so files generated by a worker process show up immediately.
+
     Returns:
         List of files with metadata
     """
+    generated_dir = settings.generated_questions_dir
+    try:
+        dir_version = os.stat(generated_dir).st_mtime_ns
+    except FileNotFoundError:
+        dir_version = None
+
+    cached = file_list_cache.get("files")
+    if cached is not None and cached[0] == dir_version:
+        return Response(content=cached[1], media_type="application/json")
+
     try:
         from backend.models import db_manager
 
         files_data = []
-        generated_dir = settings.generated_questions_dir
 
         if os.path.exists(generated_dir):
-            for filename in os.listdir(generated_dir):
-                if filename.endswith('.json'):
-                    file_id = filename.replace('.json', '')
-                    file_path = os.path.join(generated_dir, filename)
-
-                    try:
-                        with open(file_path, 'r') as f:
-                            data = json.load(f)
-                            question_count = len(data.get('questions', []))
-
-                        # Get file metadata from MongoDB
-                        upload_metadata = await db_manager.db.uploads.find_one(
-                            {'file_id': file_id}
-                        )
-
-                        if upload_metadata:
-                            original_filename = upload_metadata.get('filename', f"{file_id}.pdf")
-                            upload_time = upload_metadata.get('upload_time').timestamp()
-                        else:
-                            stat = os.stat(file_path)
-                            original_filename = f"{file_id}.pdf"
-                            upload_time = stat.st_ctime
-
-                        files_data.append({
-                            'fileId': file_id,
-                            'filename': original_filename,
-                            'questionCount': question_count,
-                            'uploadTime': upload_time
-                        })
-                    except Exception as e:
-                        print(f"Error reading file {filename}: {e}")
-                        continue
+            file_ids = [
+                filename.replace('.json', '')
+                for filename in os.listdir(generated_dir)
+                if filename.endswith('.json')
+            ]
+
+            # Fetch metadata for all files in a single query
+            cursor = db_manager.db.uploads.find(
+                {'file_id': {'$in': file_ids}},
+                {'file_id': 1, 'filename': 1, 'upload_time': 1, 'question_count': 1}
+            )
+            uploads = {doc['file_id']: doc async for doc in cursor}
+
+            question_counts = {}
+            unknown_ids = []
+            for file_id in file_ids:
+                question_count = uploads.get(file_id, {}).get('question_count')
+                if question_count is None:
+                    unknown_ids.append(file_id)
+                else:
+                    question_counts[file_id] = question_count
+
+            # Files generated before counts were stored need to be read
+            results = await asyncio.gather(
+                *(
+                    asyncio.to_thread(
+                        _read_question_count,
+                        os.path.join(generated_dir, f"{file_id}.json")
+                    )
+                    for file_id in unknown_ids
+                ),
+                return_exceptions=True
+            )
+
+            for file_id, result in zip(unknown_ids, results):
+                if isinstance(result, Exception):
+                    print(f"Error reading file {file_id}.json: {result}")
+                    continue
+                question_counts[file_id] = result
+
+            for file_id, question_count in question_counts.items():
+                try:
+                    upload_metadata = uploads.get(file_id)
+
+                    if upload_metadata:
+                        original_filename = upload_metadata.get('filename', f"{file_id}.pdf")
+                        upload_time = upload_metadata.get('upload_time').timestamp()
+                    else:
+                        stat = os.stat(os.path.join(generated_dir, f"{file_id}.json"))
+                        original_filename = f"{file_id}.pdf"
+                        upload_time = stat.st_ctime
+
+                    files_data.append({
+                        'fileId': file_id,
+                        'filename': original_filename,
+                        'questionCount': question_count,
+                        'uploadTime': upload_time
+                    })
+                except Exception as e:
+                    print(f"Error reading metadata for {file_id}: {e}")
+                    continue
 
         # Sort by upload time (newest first)
         files_data.sort(key=lambda x: x['uploadTime'], reverse=True)
 
-        return files_data
+        content = orjson.dumps(files_data)
+        file_list_cache["files"] = (dir_version, content)
+        return Response(content=content, media_type="application/json")
     except Exception as e:
         raise HTTPException(
             status_code=500,
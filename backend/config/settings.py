@@ -24,6 +24,8 @@ class Settings(BaseSettings):
     llm_provider: str = "mlx"
     model_name: str = "mlx-community/Meta-Llama-3-8B-Instruct-4bit"
     model_cache_dir: str = "./models"
+    # Maximum chunks sent to the LLM concurrently
+    llm_max_concurrency: int = 4
 
     # MLX Specific
     mlx_max_tokens: int = 2048
@@ -43,6 +45,11 @@ class Settings(BaseSettings):
     default_questions_per_chunk: int = 5
     min_difficulty: str = "easy"
     max_difficulty: str = "hard"
+    # On-disk cache of LLM responses per chunk (0 disables)
+    response_cache_max_mb: int = 256
+
+    # Task Queue (optional; pipeline runs in-process when unset)
+    redis_url: str = ""
 
     # CORS Settings
     cors_origins: str = "http://localhost:3000,http://localhost:3001"
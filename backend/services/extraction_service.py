@@ -1,56 +1,131 @@
 """PDF text extraction service."""
 import os
-import pymupdf4llm
-from typing import Optional
+import re
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from array import array
+from bisect import bisect_right
+from typing import Iterator, Optional
 from backend.config import settings
-from backend.models import ProcessingStatus
+from backend.models import ProcessingStatus, UploadMetadata
 from backend.services.upload_service import upload_service
+from backend.services import fast_io
+
+# Chunk break patterns (lookahead keeps overlapping paragraph breaks)
+_PARAGRAPH_BREAK_RE = re.compile(r'(?=\n\n)')
+_SENTENCE_BREAK_RE = re.compile(r'\.')
+
+
+def _extract_pdf_to_file(pdf_path: str, text_path: str) -> bool:
+    """
+    Convert a PDF to markdown page by page, streaming it to a text file.
+
+    Runs in a worker process; only one page of markdown is held in memory
+    at a time and nothing but a flag is sent back to the parent.
+
+    Args:
+        pdf_path: Path to the PDF file
+        text_path: Path of the markdown file to write
+
+    Returns:
+        True if any text was extracted
+    """
+    # Imported here so only extraction workers pay for loading PyMuPDF
+    import pymupdf
+    import pymupdf4llm
+
+    has_text = False
+
+    with pymupdf.open(pdf_path) as doc:
+        # Detect header levels once for the whole document, not per page
+        # (only the non-layout engine exposes this)
+        identify_headers = getattr(pymupdf4llm, "IdentifyHeaders", None)
+        hdr_info = identify_headers(doc) if identify_headers else None
+
+        with open(text_path, 'wb', buffering=1 << 20) as f:
+            for page in doc:
+                md_text = pymupdf4llm.to_markdown(doc, pages=[page.number], hdr_info=hdr_info)
+                if md_text:
+                    has_text = has_text or not md_text.isspace()
+                    f.write(md_text.encode('utf-8'))
+
+    if not has_text:
+        os.remove(text_path)
+
+    return has_text
 
 
 class ExtractionService:
     """Handles PDF text extraction."""
 
+    # Process pool for CPU-bound PDF parsing; started by the app lifespan
+    _pdf_pool: Optional[ProcessPoolExecutor] = None
+
+    @classmethod
+    def start_pdf_pool(cls):
+        """Start the process pool used for PDF extraction (one worker per core)."""
+        if cls._pdf_pool is None:
+            cls._pdf_pool = ProcessPoolExecutor(
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+    @classmethod
+    def shutdown_pdf_pool(cls):
+        """Shut down the PDF extraction process pool."""
+        if cls._pdf_pool is not None:
+            cls._pdf_pool.shutdown()
+            cls._pdf_pool = None
+
     @staticmethod
-    async def extract_text_from_pdf(file_id: str) -> str:
+    async def extract_text_from_pdf(
+        file_id: str,
+        upload_metadata: Optional[UploadMetadata] = None
+    ) -> str:
         """
         Extract text from PDF file.
 
         Args:
             file_id: Unique file identifier
+            upload_metadata: Already-fetched upload metadata (fetched if omitted)
 
         Returns:
-            Extracted text as string
+            Path to the extracted text file
         """
         # Update status to EXTRACTING
         await upload_service.update_status(file_id, ProcessingStatus.EXTRACTING)
 
         try:
-            # Get upload metadata
-            upload_metadata = await upload_service.get_upload_status(file_id)
+            # Get upload metadata unless the caller already has it
+            if upload_metadata is None:
+                upload_metadata = await upload_service.get_upload_status(file_id)
             pdf_path = upload_metadata.file_path
 
             if not os.path.exists(pdf_path):
                 raise FileNotFoundError(f"PDF file not found: {pdf_path}")
 
-            # Extract text using pymupdf4llm (optimized for LLM processing)
-            # This handles both text-based and image-based PDFs
-            md_text = pymupdf4llm.to_markdown(pdf_path)
-
-            if not md_text or len(md_text.strip()) == 0:
-                raise ValueError("No text could be extracted from PDF")
-
-            # Save extracted text
             text_filename = f"{file_id}.txt"
             text_path = os.path.join(settings.extracted_text_dir, text_filename)
 
-            with open(text_path, 'w', encoding='utf-8') as f:
-                f.write(md_text)
+            # Extract text using pymupdf4llm (optimized for LLM processing)
+            # This handles both text-based and image-based PDFs. It is CPU-bound,
+            # so it runs in the process pool (or a thread if no pool is running)
+            # and streams the markdown straight to disk page by page
+            has_text = await asyncio.get_running_loop().run_in_executor(
+                ExtractionService._pdf_pool,
+                _extract_pdf_to_file,
+                pdf_path,
+                text_path
+            )
+
+            if not has_text:
+                raise ValueError("No text could be extracted from PDF")
 
             # Update metadata
             await upload_service.set_extracted_text_path(file_id, text_path)
             await upload_service.update_status(file_id, ProcessingStatus.EXTRACTED)
 
-            return md_text
+            return text_path
 
         except Exception as e:
             # Update status to FAILED
@@ -62,17 +137,22 @@ class ExtractionService:
             raise
 
     @staticmethod
-    async def get_extracted_text(file_id: str) -> Optional[str]:
+    async def get_extracted_text(
+        file_id: str,
+        upload_metadata: Optional[UploadMetadata] = None
+    ) -> Optional[str]:
         """
         Get previously extracted text.
 
         Args:
             file_id: Unique file identifier
+            upload_metadata: Already-fetched upload metadata (fetched if omitted)
 
         Returns:
             Extracted text or None if not yet extracted
         """
-        upload_metadata = await upload_service.get_upload_status(file_id)
+        if upload_metadata is None:
+            upload_metadata = await upload_service.get_upload_status(file_id)
 
         if not upload_metadata.extracted_text_path:
             return None
@@ -80,21 +160,23 @@ class ExtractionService:
         if not os.path.exists(upload_metadata.extracted_text_path):
             return None
 
-        with open(upload_metadata.extracted_text_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        return await asyncio.to_thread(fast_io.read_text, upload_metadata.extracted_text_path)
 
     @staticmethod
-    def chunk_text(text: str, max_chunk_size: int = None, overlap: int = None) -> list[str]:
+    def chunk_text(text: str, max_chunk_size: int = None, overlap: int = None) -> Iterator[str]:
         """
         Split text into chunks for processing.
 
+        Chunks are yielded lazily so callers that iterate once never hold
+        every chunk in memory at the same time.
+
         Args:
             text: Text to chunk
             max_chunk_size: Maximum chunk size in characters
             overlap: Number of characters to overlap between chunks
 
-        Returns:
-            List of text chunks
+        Yields:
+            Text chunks
         """
         if max_chunk_size is None:
             max_chunk_size = settings.max_chunk_size
@@ -103,9 +185,13 @@ class ExtractionService:
             overlap = settings.chunk_overlap
 
         if len(text) <= max_chunk_size:
-            return [text]
+            yield text
+            return
+
+        # Precompute break positions once
+        paragraph_breaks = array('i', (m.start() for m in _PARAGRAPH_BREAK_RE.finditer(text)))
+        sentence_breaks = array('i', (m.start() for m in _SENTENCE_BREAK_RE.finditer(text)))
 
-        chunks = []
         start = 0
 
         while start < len(text):
@@ -113,25 +199,28 @@ class ExtractionService:
 
             # Try to break at paragraph boundary
             if end < len(text):
-                # Look for paragraph break
-                paragraph_break = text.rfind('\n\n', start, end)
-                if paragraph_break > start:
-                    end = paragraph_break
+                # Look for last paragraph break fully inside the window
+                idx = bisect_right(paragraph_breaks, end - 2) - 1
+                if idx >= 0 and paragraph_breaks[idx] > start:
+                    end = paragraph_breaks[idx]
 
                 # If no paragraph break, look for sentence break
-                elif '.' in text[start:end]:
-                    sentence_break = text.rfind('.', start, end) + 1
-                    if sentence_break > start:
-                        end = sentence_break
+                else:
+                    idx = bisect_right(sentence_breaks, end - 1) - 1
+                    if idx >= 0 and sentence_breaks[idx] >= start:
+                        end = sentence_breaks[idx] + 1
 
             chunk = text[start:end].strip()
             if chunk:
-                chunks.append(chunk)
-
-            # Move to next chunk with overlap
-            start = end - overlap if end < len(text) else end
-
-        return chunks
+                yield chunk
+
+            # Move to next chunk with overlap, always making forward progress.
+            # When an early break leaves end - overlap <= start, the next
+            # chunk starts at end with no overlap rather than stepping back
+            if end < len(text) and end - overlap > start:
+                start = end - overlap
+            else:
+                start = end
 
 
 # Global instance
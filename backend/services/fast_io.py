@@ -0,0 +1,70 @@
+"""Fast file I/O helpers."""
+import os
+from typing import Any
+import orjson
+
+
+def read_bytes(path: str) -> bytes:
+    """
+    Read a whole file as raw bytes.
+
+    Sizes the read from fstat and issues positional reads on a raw file
+    descriptor, bypassing the buffered I/O layer entirely.
+
+    Args:
+        path: File path
+
+    Returns:
+        File contents
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        data = os.pread(fd, size, 0)
+        if len(data) < size:
+            # Short read (e.g. a file still being written); collect the rest
+            parts = [data]
+            offset = len(data)
+            while offset < size:
+                part = os.pread(fd, size - offset, offset)
+                if not part:
+                    break
+                parts.append(part)
+                offset += len(part)
+            data = b''.join(parts)
+        return data
+    finally:
+        os.close(fd)
+
+
+def read_text(path: str) -> str:
+    """
+    Read a whole UTF-8 text file.
+
+    Decodes once from the raw bytes instead of going through the
+    incremental text I/O layer.
+
+    Args:
+        path: File path
+
+    Returns:
+        File contents as string
+    """
+    return read_bytes(path).decode('utf-8')
+
+
+def load_json(path: str) -> Any:
+    """
+    Load a JSON file.
+
+    Parses directly from the raw bytes with orjson, skipping the
+    intermediate str copy that json.load makes.
+
+    Args:
+        path: File path
+
+    Returns:
+        Parsed JSON data
+    """
+    return orjson.loads(read_bytes(path))
+
@@ -1,31 +1,96 @@
 """Question generation and management service."""
 import os
-import json
+import re
+import gzip
 import asyncio
+import tempfile
+import orjson
 from datetime import datetime
+from functools import lru_cache
 from typing import List, Optional, Dict, Any
+from bson import ObjectId
+from pydantic import TypeAdapter
 from backend.config import settings
 from backend.models import (
     db_manager,
     Question,
     QuestionCreate,
     ProcessingStatus,
+    UploadMetadata,
     GeneratedQuestionsResponse
 )
 from backend.services.upload_service import upload_service
 from backend.services.extraction_service import extraction_service
+from backend.services import fast_io
 from ml.inference import llm_service
 
+# Validates a whole list of question dicts in one pydantic-core call
+_question_list_adapter = TypeAdapter(List[Question])
+
+# Fields every projection must include so documents still validate as Question
+_REQUIRED_QUESTION_FIELDS = frozenset(
+    field.alias or name
+    for name, field in Question.model_fields.items()
+    if field.is_required()
+)
+
+
+@lru_cache(maxsize=4096)
+def _object_id(question_id: str) -> ObjectId:
+    """Parse a question ID, caching repeat lookups of the same ID."""
+    return ObjectId(question_id)
+
+
+def _replace_file(path: str, content: bytes):
+    """Write content to a temporary file and move it into place."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _write_questions_file(questions_path: str, questions: List[Dict[str, Any]]):
+    """
+    Write generated questions as a single JSON document.
+
+    A gzip-compressed copy is written alongside as <file>.json.gz for the
+    static mount to serve to clients that accept gzip. Both files are
+    written to a temporary file and moved into place, so readers never see
+    a half-written file; the sidecar goes first so it's never older than
+    the JSON.
+
+    Args:
+        questions_path: Destination file path
+        questions: Question dicts in chunk order
+    """
+    content = orjson.dumps(
+        {"questions": questions},
+        default=str,
+        option=orjson.OPT_NAIVE_UTC
+    )
+
+    _replace_file(f"{questions_path}.gz", gzip.compress(content, compresslevel=6, mtime=0))
+    _replace_file(questions_path, content)
+
 
 class QuestionService:
     """Handles question generation and management."""
 
-    async def generate_questions_from_file(self, file_id: str) -> GeneratedQuestionsResponse:
+    async def generate_questions_from_file(
+        self,
+        file_id: str,
+        upload_metadata: Optional[UploadMetadata] = None
+    ) -> GeneratedQuestionsResponse:
         """
         Generate questions from uploaded PDF file.
 
         Args:
             file_id: Unique file identifier
+            upload_metadata: Already-fetched upload metadata (fetched if omitted)
 
         Returns:
             GeneratedQuestionsResponse with generated questions
@@ -34,16 +99,28 @@ class QuestionService:
             # Update status to GENERATING
             await upload_service.update_status(file_id, ProcessingStatus.GENERATING)
 
+            if upload_metadata is None:
+                upload_metadata = await upload_service.get_upload_status(file_id)
+
             # Get or extract text
-            text = await extraction_service.get_extracted_text(file_id)
+            text = await extraction_service.get_extracted_text(file_id, upload_metadata)
             if not text:
                 # Extract text if not already done
-                text = await extraction_service.extract_text_from_pdf(file_id)
-
-            # Chunk text for processing
-            chunks = extraction_service.chunk_text(text)
-            total_chunks = len(chunks)
-            print(f"Processing {total_chunks} chunks for file {file_id}")
+                upload_metadata.extracted_text_path = await extraction_service.extract_text_from_pdf(
+                    file_id,
+                    upload_metadata
+                )
+                text = await extraction_service.get_extracted_text(file_id, upload_metadata)
+
+            # Chunk text for processing (materialized: progress needs the total)
+            chunks = list(extraction_service.chunk_text(text))
+
+            # Identical chunks (repeated headers, boilerplate pages) would only
+            # produce the same questions again, so each distinct chunk is sent
+            # once, keeping first-occurrence order
+            unique_chunks = list(dict.fromkeys(chunks))
+            total_chunks = len(unique_chunks)
+            print(f"Processing {total_chunks} chunks for file {file_id} ({len(chunks) - total_chunks} duplicates skipped)")
 
             # Initialize progress
             await upload_service.update_progress(
@@ -53,57 +130,66 @@ class QuestionService:
                 "Starting question generation..."
             )
 
-            all_questions = []
-
-            # Process chunks sequentially
-            for idx, chunk in enumerate(chunks):
-                try:
-                    current_chunk = idx + 1
-                    print(f"Processing chunk {current_chunk}/{total_chunks}")
-
-                    # Update progress
-                    await upload_service.update_progress(
-                        file_id,
-                        current_chunk,
-                        total_chunks,
-                        f"Processing chunk {current_chunk}/{total_chunks}"
-                    )
-
-                    # Generate questions for this chunk
-                    result = llm_service.generate_questions(chunk)
-
-                    if "questions" in result:
-                        for q_data in result["questions"]:
-                            # Add file_id and timestamps
-                            q_data["file_id"] = file_id
-                            q_data["created_at"] = datetime.utcnow()
-                            all_questions.append(q_data)
-
-                        print(f"Chunk {current_chunk} complete. Total questions: {len(all_questions)}")
+            questions_filename = f"{file_id}.json"
+            questions_path = os.path.join(
+                settings.generated_questions_dir,
+                questions_filename
+            )
+            completed = 0
+
+            async def report_progress(idx: int, result: Optional[Dict[str, Any]]):
+                """Stamp the chunk's questions and update progress."""
+                nonlocal completed
+                completed += 1
+                print(f"Chunk {idx + 1} complete ({completed}/{total_chunks})")
+
+                if result and "questions" in result:
+                    for q_data in result["questions"]:
+                        # Add file_id and timestamps
+                        q_data["file_id"] = file_id
+                        q_data["created_at"] = datetime.utcnow()
+
+                await upload_service.update_progress(
+                    file_id,
+                    completed,
+                    total_chunks,
+                    f"Processed chunk {completed}/{total_chunks}"
+                )
+
+            # Send all chunks to the LLM as one concurrent batch
+            results = await llm_service.generate_questions_batch(
+                unique_chunks,
+                on_result=report_progress
+            )
 
-                except Exception as e:
-                    print(f"Error generating questions for chunk {idx}: {e}")
-                    # Continue with next chunk even if this one fails
+            # Collect questions in chunk order
+            all_questions = [
+                q_data
+                for result in results
+                if result and "questions" in result
+                for q_data in result["questions"]
+            ]
 
             if not all_questions:
                 raise ValueError("No questions were generated from the text")
 
-            # Save generated questions to file
-            questions_filename = f"{file_id}.json"
-            questions_path = os.path.join(
-                settings.generated_questions_dir,
-                questions_filename
+            # Record the count first: moving the file into place changes the
+            # directory's mtime, which invalidates cached file listings in
+            # other processes too, so the metadata must already be current
+            await upload_service.set_generated_questions_path(
+                file_id,
+                questions_path,
+                question_count=len(all_questions)
             )
 
-            with open(questions_path, 'w', encoding='utf-8') as f:
-                json.dump({"questions": all_questions}, f, indent=2, default=str)
+            # Save generated questions to file
+            await asyncio.to_thread(_write_questions_file, questions_path, all_questions)
 
-            # Update metadata
-            await upload_service.set_generated_questions_path(file_id, questions_path)
             await upload_service.update_status(file_id, ProcessingStatus.READY)
+            upload_service.invalidate_file_list()
 
             # Convert to Question objects
-            questions = [Question(**q) for q in all_questions]
+            questions = _question_list_adapter.validate_python(all_questions)
 
             return GeneratedQuestionsResponse(
                 file_id=file_id,
@@ -120,17 +206,51 @@ class QuestionService:
             )
             raise
 
-    async def get_generated_questions(self, file_id: str) -> Optional[GeneratedQuestionsResponse]:
+    async def run_pipeline(self, file_id: str, upload_metadata: Optional[UploadMetadata] = None):
+        """
+        Run the full pipeline: extract text and generate questions.
+
+        Args:
+            file_id: Unique file identifier
+            upload_metadata: Already-fetched upload metadata (fetched if omitted)
+        """
+        try:
+            if upload_metadata is None:
+                upload_metadata = await upload_service.get_upload_status(file_id)
+
+            # Extract text
+            upload_metadata.extracted_text_path = await extraction_service.extract_text_from_pdf(
+                file_id,
+                upload_metadata
+            )
+
+            # Generate questions
+            await self.generate_questions_from_file(file_id, upload_metadata)
+        except Exception as e:
+            # Update status to failed
+            await upload_service.update_status(
+                file_id,
+                ProcessingStatus.FAILED,
+                error=str(e)
+            )
+
+    async def get_generated_questions(
+        self,
+        file_id: str,
+        upload_metadata: Optional[UploadMetadata] = None
+    ) -> Optional[GeneratedQuestionsResponse]:
         """
         Get previously generated questions for a file.
 
         Args:
             file_id: Unique file identifier
+            upload_metadata: Already-fetched upload metadata (fetched if omitted)
 
         Returns:
             GeneratedQuestionsResponse or None
         """
-        upload_metadata = await upload_service.get_upload_status(file_id)
+        if upload_metadata is None:
+            upload_metadata = await upload_service.get_upload_status(file_id)
 
         if not upload_metadata.generated_questions_path:
             return None
@@ -139,10 +259,9 @@ class QuestionService:
             return None
 
         # Load questions from file
-        with open(upload_metadata.generated_questions_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = await asyncio.to_thread(fast_io.load_json, upload_metadata.generated_questions_path)
 
-        questions = [Question(**q) for q in data["questions"]]
+        questions = _question_list_adapter.validate_python(data["questions"])
 
         return GeneratedQuestionsResponse(
             file_id=file_id,
@@ -179,8 +298,9 @@ class QuestionService:
             q_dict["updated_at"] = now
             questions_data.append(q_dict)
 
-        # Insert into database
-        result = await db.questions.insert_many(questions_data)
+        # Unordered so the server can apply the batch without stopping at the
+        # first error; IDs are assigned client-side, so they're known either way
+        result = await db.questions.insert_many(questions_data, ordered=False)
 
         return [str(id) for id in result.inserted_ids]
 
@@ -190,17 +310,26 @@ class QuestionService:
         limit: int = 100,
         question_type: Optional[str] = None,
         difficulty: Optional[str] = None,
-        topic: Optional[str] = None
+        topic: Optional[str] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
     ) -> List[Question]:
         """
         Retrieve questions from database with filters.
 
+        Results are ordered by _id. Passing the last ID of the previous page
+        as cursor seeks past earlier pages through an index instead of
+        skipping them; a topic filter still scans until the page is filled.
+
         Args:
-            skip: Number of questions to skip
+            skip: Number of questions to skip (ignored when cursor is given)
             limit: Maximum number of questions to return
             question_type: Filter by question type
             difficulty: Filter by difficulty
             topic: Filter by topic
+            cursor: ID of the last question on the previous page
+            fields: Fields to fetch (required Question fields are always
+                included); all fields when omitted
 
         Returns:
             List of questions
@@ -214,20 +343,28 @@ class QuestionService:
         if difficulty:
             filter_dict["difficulty"] = difficulty
         if topic:
-            filter_dict["topic"] = {"$regex": topic, "$options": "i"}
+            # Escaped so the topic matches literally (e.g. "C++", "Q&A (Part 1)")
+            filter_dict["topic"] = {"$regex": re.escape(topic), "$options": "i"}
+
+        if cursor:
+            filter_dict["_id"] = {"$gt": _object_id(cursor)}
+
+        projection = None
+        if fields:
+            projection = dict.fromkeys(_REQUIRED_QUESTION_FIELDS.union(fields), 1)
 
         # Query database
-        cursor = db.questions.find(filter_dict).skip(skip).limit(limit)
-        questions_data = await cursor.to_list(length=limit)
+        query = db.questions.find(filter_dict, projection).sort("_id", 1)
+        if not cursor:
+            query = query.skip(skip)
+        questions_data = [q async for q in query.limit(limit)]
 
-        return [Question(**q) for q in questions_data]
+        return _question_list_adapter.validate_python(questions_data)
 
     async def get_question_by_id(self, question_id: str) -> Optional[Question]:
         """Get a single question by ID."""
-        from bson import ObjectId
-
         db = db_manager.get_database()
-        question_data = await db.questions.find_one({"_id": ObjectId(question_id)})
+        question_data = await db.questions.find_one({"_id": _object_id(question_id)})
 
         if not question_data:
             return None
@@ -249,13 +386,11 @@ class QuestionService:
         Returns:
             True if updated successfully
         """
-        from bson import ObjectId
-
         db = db_manager.get_database()
         updates["updated_at"] = datetime.utcnow()
 
         result = await db.questions.update_one(
-            {"_id": ObjectId(question_id)},
+            {"_id": _object_id(question_id)},
             {"$set": updates}
         )
 
@@ -271,10 +406,8 @@ class QuestionService:
         Returns:
             True if deleted successfully
         """
-        from bson import ObjectId
-
         db = db_manager.get_database()
-        result = await db.questions.delete_one({"_id": ObjectId(question_id)})
+        result = await db.questions.delete_one({"_id": _object_id(question_id)})
 
         return result.deleted_count > 0
 
@@ -1,11 +1,139 @@
 """File upload service."""
 import os
-import uuid
+import asyncio
+import aiofiles
 from datetime import datetime
+from typing import Any, Dict, Optional
+from cachetools import TTLCache
 from fastapi import UploadFile, HTTPException
+from pymongo import UpdateOne
 from backend.config import settings
 from backend.models import db_manager, UploadResponse, UploadMetadata, ProcessingStatus
 
+# Cached JSON body for the file listing endpoint
+file_list_cache = TTLCache(maxsize=1, ttl=30)
+
+# Short-lived upload metadata cache for status polling
+_status_cache = TTLCache(maxsize=10_000, ttl=1.0)
+
+
+class ProgressCoalescer:
+    """
+    Buffers progress updates and writes them to the database in batches.
+
+    Updates only record the latest progress per file in memory. A background
+    task flushes everything pending with a single bulk_write per interval, so
+    a long generation run costs a few writes per second instead of one per
+    chunk. Updates submitted with flush=True, and all updates while the
+    flusher is not running, are written directly.
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # Batch currently being written, still visible to readers
+        self._inflight: Dict[str, Dict[str, Any]] = {}
+        # Writes go out one at a time so an older batch can't land last
+        self._write_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the background flusher is running."""
+        return self._task is not None
+
+    def pending(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """Get progress fields not yet written for a file."""
+        inflight = self._inflight.get(file_id)
+        pending = self._pending.get(file_id)
+        if inflight is None or pending is None:
+            return pending or inflight
+        return {**inflight, **pending}
+
+    async def submit(self, file_id: str, update_data: Dict[str, Any], flush: bool = False):
+        """
+        Record a progress update for a file.
+
+        Args:
+            file_id: Unique file identifier
+            update_data: Fields to $set on the upload document
+            flush: Write this file's progress immediately
+        """
+        # Later updates override earlier ones, like consecutive $sets would
+        self._pending.setdefault(file_id, {}).update(update_data)
+
+        if flush or not self.running:
+            async with self._write_lock:
+                # May already have gone out with a batch while we waited
+                pending = self._pending.pop(file_id, None)
+                if pending is not None:
+                    await self._write_batch({file_id: pending})
+
+    async def flush(self):
+        """Write all pending updates in one batch."""
+        async with self._write_lock:
+            if not self._pending:
+                return
+
+            pending, self._pending = self._pending, {}
+            await self._write_batch(pending)
+
+    async def _write_batch(self, batch: Dict[str, Dict[str, Any]]):
+        """Write a batch taken from pending; caller holds the write lock."""
+        self._inflight = batch
+        try:
+            await self._write(batch)
+        except BaseException:
+            # Put the batch back without clobbering newer updates
+            for file_id, update_data in batch.items():
+                self._pending[file_id] = {**update_data, **self._pending.get(file_id, {})}
+            raise
+        finally:
+            self._inflight = {}
+
+    @staticmethod
+    async def _write(pending: Dict[str, Dict[str, Any]]):
+        """Apply updates to the uploads collection."""
+        db = db_manager.get_database()
+        await db.uploads.bulk_write(
+            [
+                UpdateOne({"file_id": file_id}, {"$set": update_data})
+                for file_id, update_data in pending.items()
+            ],
+            ordered=False
+        )
+
+    async def _run(self):
+        """Flush pending updates periodically."""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error flushing progress updates: {e}")
+
+    def start(self):
+        """Start the background flusher."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background flusher and write anything still pending."""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        await self.flush()
+
+
+progress_coalescer = ProgressCoalescer()
+
 
 class UploadService:
     """Handles file upload operations."""
@@ -29,17 +157,19 @@ class UploadService:
             )
 
         # Generate unique file ID
-        file_id = str(uuid.uuid4())
+        file_id = os.urandom(16).hex()
         file_extension = '.pdf'
         saved_filename = f"{file_id}{file_extension}"
         file_path = os.path.join(settings.upload_dir, saved_filename)
 
-        # Save file to disk
+        # Stream file to disk in chunks instead of buffering the whole PDF
         try:
-            contents = await file.read()
-            with open(file_path, 'wb') as f:
-                f.write(contents)
+            async with aiofiles.open(file_path, 'wb') as f:
+                while chunk := await file.read(1024 * 1024):
+                    await f.write(chunk)
         except Exception as e:
+            if os.path.exists(file_path):
+                os.remove(file_path)
             raise HTTPException(
                 status_code=500,
                 detail=f"Failed to save file: {str(e)}"
@@ -58,6 +188,7 @@ class UploadService:
         # Save metadata to database
         db = db_manager.get_database()
         await db.uploads.insert_one(metadata.dict(by_alias=True, exclude={"id"}))
+        UploadService.invalidate_file_list()
 
         return UploadResponse(
             file_id=file_id,
@@ -87,8 +218,35 @@ class UploadService:
                 detail=f"File with ID {file_id} not found"
             )
 
+        # Overlay progress that has not been flushed yet
+        pending = progress_coalescer.pending(file_id)
+        if pending:
+            upload.update(pending)
+
         return UploadMetadata(**upload)
 
+    @staticmethod
+    async def get_cached_upload_status(file_id: str) -> UploadMetadata:
+        """
+        Get upload metadata, served from a short-lived cache.
+
+        Intended for status polling. Every metadata write through this
+        service invalidates the cached entry.
+
+        Args:
+            file_id: Unique file identifier
+
+        Returns:
+            UploadMetadata
+        """
+        upload_metadata = _status_cache.get(file_id)
+
+        if upload_metadata is None:
+            upload_metadata = await UploadService.get_upload_status(file_id)
+            _status_cache[file_id] = upload_metadata
+
+        return upload_metadata
+
     @staticmethod
     async def update_status(
         file_id: str,
@@ -113,6 +271,7 @@ class UploadService:
             {"file_id": file_id},
             {"$set": update_data}
         )
+        _status_cache.pop(file_id, None)
 
         if result.matched_count == 0:
             raise HTTPException(
@@ -128,15 +287,31 @@ class UploadService:
             {"file_id": file_id},
             {"$set": {"extracted_text_path": text_path}}
         )
+        _status_cache.pop(file_id, None)
 
     @staticmethod
-    async def set_generated_questions_path(file_id: str, questions_path: str):
-        """Set the generated questions file path."""
+    async def set_generated_questions_path(
+        file_id: str,
+        questions_path: str,
+        question_count: int = None
+    ):
+        """Set the generated questions file path and question count."""
         db = db_manager.get_database()
+        update_data = {"generated_questions_path": questions_path}
+
+        if question_count is not None:
+            update_data["question_count"] = question_count
+
         await db.uploads.update_one(
             {"file_id": file_id},
-            {"$set": {"generated_questions_path": questions_path}}
+            {"$set": update_data}
         )
+        _status_cache.pop(file_id, None)
+
+    @staticmethod
+    def invalidate_file_list():
+        """Drop the cached file listing so the next request rescans."""
+        file_list_cache.clear()
 
     @staticmethod
     async def update_progress(
@@ -148,13 +323,15 @@ class UploadService:
         """
         Update processing progress for a file.
 
+        Writes are coalesced by progress_coalescer; reads through this
+        service see the latest value immediately.
+
         Args:
             file_id: Unique file identifier
             current: Current progress count
             total: Total items to process
             message: Optional progress message
         """
-        db = db_manager.get_database()
         update_data = {
             "progress_current": current,
             "progress_total": total
@@ -163,10 +340,9 @@ class UploadService:
         if message:
             update_data["progress_message"] = message
 
-        await db.uploads.update_one(
-            {"file_id": file_id},
-            {"$set": update_data}
-        )
+        # Final progress is written right away rather than on the next tick
+        await progress_coalescer.submit(file_id, update_data, flush=current >= total)
+        _status_cache.pop(file_id, None)
 
 
 # Global instance
@@ -0,0 +1,47 @@
+"""Background worker for the processing pipeline.
+
+Run with: arq backend.worker.WorkerSettings
+"""
+import os
+from arq.connections import RedisSettings
+from backend.config import settings
+from backend.models import db_manager
+from backend.services.extraction_service import extraction_service
+from backend.services.upload_service import progress_coalescer
+from backend.services.question_service import question_service
+from ml.inference import llm_service
+
+
+async def run_pipeline(ctx, file_id: str):
+    """Run the full pipeline for an uploaded file."""
+    await question_service.run_pipeline(file_id)
+
+
+async def startup(ctx):
+    """Worker startup events."""
+    os.makedirs(settings.extracted_text_dir, exist_ok=True)
+    os.makedirs(settings.generated_questions_dir, exist_ok=True)
+
+    extraction_service.start_pdf_pool()
+    await db_manager.connect()
+    progress_coalescer.start()
+
+
+async def shutdown(ctx):
+    """Worker shutdown events."""
+    await progress_coalescer.stop()
+    await llm_service.aclose()
+    extraction_service.shutdown_pdf_pool()
+    await db_manager.disconnect()
+
+
+class WorkerSettings:
+    """arq worker configuration."""
+
+    functions = [run_pipeline]
+    on_startup = startup
+    on_shutdown = shutdown
+    redis_settings = RedisSettings.from_dsn(settings.redis_url or "redis://localhost:6379")
+
+    # Question generation over a large PDF can run for a long time
+    job_timeout = 3 * 60 * 60
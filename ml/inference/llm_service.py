@@ -1,17 +1,35 @@
 """LLM inference service with support for multiple providers."""
+import re
+import copy
 import json
-from typing import Optional, Dict, Any
+import asyncio
+import importlib.util
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Callable, Awaitable
 from backend.config import settings
 from ml.prompts import get_question_generation_prompt, get_system_prompt
+from ml.inference.response_cache import response_cache
 
-# Try to import MLX, but it's optional (only works on macOS)
-try:
-    import mlx_lm
-    MLX_AVAILABLE = True
-except ImportError:
-    MLX_AVAILABLE = False
+# MLX is optional (only works on macOS). Only check that it is installed here;
+# the heavy import happens when a model is actually loaded.
+MLX_AVAILABLE = importlib.util.find_spec("mlx_lm") is not None
+if not MLX_AVAILABLE:
     print("MLX not available - will use Ollama or OpenAI instead")
 
+# Markdown code fences around the model's JSON output
+_FENCE_RE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$')
+
+_json_decoder = json.JSONDecoder()
+
+
+def _is_questions_result(result: Any) -> bool:
+    """Check that a parsed response has the expected {"questions": [{...}, ...]} shape."""
+    if not isinstance(result, dict):
+        return False
+    questions = result.get("questions")
+    return isinstance(questions, list) and all(isinstance(q, dict) for q in questions)
+
 
 class LLMService:
     """Handles LLM inference for question generation."""
@@ -19,7 +37,17 @@ class LLMService:
     def __init__(self):
         self.model = None
         self.tokenizer = None
+        self._sampler = None
+        # KV cache of the shared system-prompt prefix (MLX only)
+        self._prefix_tokens: Optional[List[int]] = None
+        self._prefix_cache = None
         self.provider = settings.llm_provider
+        # Pooled keep-alive client shared by all Ollama requests
+        self._ollama_client: Optional[httpx.AsyncClient] = None
+        self._openai_client = None
+        # MLX state is used from a single thread: model load, prefix
+        # prefill and generation all run here, one call at a time
+        self._mlx_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mlx")
 
     def load_model(self):
         """Load the LLM model based on provider."""
@@ -39,17 +67,155 @@ class LLMService:
     def _load_mlx_model(self):
         """Load MLX model for Apple Silicon."""
         try:
+            import mlx_lm
+            from mlx_lm.sample_utils import make_sampler
+
             print(f"Loading MLX model: {settings.model_name}")
             self.model, self.tokenizer = mlx_lm.load(
                 settings.model_name,
                 tokenizer_config={"trust_remote_code": True}
             )
+
+            # MLX uses a sampler for temperature control; settings are fixed,
+            # so build it once and reuse it for every generation
+            self._sampler = make_sampler(
+                temp=settings.mlx_temperature,
+                top_p=0.95
+            )
             print("MLX model loaded successfully")
         except Exception as e:
             print(f"Error loading MLX model: {e}")
             raise
 
-    def generate_questions(
+        self._build_prefix_cache()
+
+    @staticmethod
+    def _format_prompt(system_prompt: str, user_prompt: str) -> str:
+        """Combine prompts for instruction-tuned models."""
+        return f"""<|system|>
+{system_prompt}
+<|user|>
+{user_prompt}
+<|assistant|>
+"""
+
+    def _build_prefix_cache(self):
+        """
+        Prefill the system-prompt prefix once and keep its KV cache.
+
+        Every MLX prompt starts with the same system section, so each
+        generation can start from a copy of this cache and only prefill
+        the chunk-specific tokens. Leaves the cache unset (plain
+        generation) if this mlx_lm version can't support it.
+        """
+        try:
+            import mlx.core as mx
+            from mlx_lm.models.cache import make_prompt_cache
+
+            # Everything in the formatted prompt before the user prompt
+            prefix = self._format_prompt(get_system_prompt(), "\0").split("\0")[0]
+            prefix_tokens = self.tokenizer.encode(prefix)
+
+            cache = make_prompt_cache(self.model)
+            self.model(mx.array(prefix_tokens)[None], cache=cache)
+            mx.eval([c.state for c in cache])
+
+            self._prefix_tokens = prefix_tokens
+            self._prefix_cache = cache
+            print(f"Cached {len(prefix_tokens)} system prompt tokens")
+        except Exception as e:
+            print(f"System prompt caching unavailable, using full prefill: {e}")
+            self._prefix_tokens = None
+            self._prefix_cache = None
+
+    async def generate_questions_batch(
+        self,
+        texts: List[str],
+        num_questions: int = None,
+        on_result: Optional[Callable[[int, Optional[Dict[str, Any]]], Awaitable[None]]] = None
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Generate questions for several texts concurrently.
+
+        Up to llm_max_concurrency requests are in flight at once, so the
+        server can batch them. MLX generations still run one at a time.
+        Longer texts are dispatched first so a long straggler doesn't
+        start last and stretch the tail of the batch. Results are cached
+        on disk per text, so unchanged chunks skip the LLM on re-runs.
+
+        Args:
+            texts: Source texts
+            num_questions: Number of questions to generate per text
+            on_result: Optional async callback invoked with (index, result)
+                as each text finishes; errors it raises are logged, not propagated
+
+        Returns:
+            Results in input order (None for texts that failed or returned
+            an unexpected shape)
+        """
+        if num_questions is None:
+            num_questions = settings.default_questions_per_chunk
+
+        semaphore = asyncio.Semaphore(settings.llm_max_concurrency)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+
+        # Look up every text in the cache first, so only misses compete for
+        # LLM slots and nothing awaits between dispatch and the semaphore
+        cache_keys = [response_cache.key(text, num_questions) for text in texts]
+        cached = await asyncio.to_thread(response_cache.get_many, cache_keys)
+
+        async def handle_result(idx: int, result: Optional[Dict[str, Any]]):
+            """Store a result and notify the caller."""
+            results[idx] = result
+            if on_result is not None:
+                try:
+                    await on_result(idx, result)
+                except Exception as e:
+                    print(f"Error handling result for chunk {idx}: {e}")
+
+        async def generate_one(idx: int):
+            """Generate questions for one text, bounded by the semaphore."""
+            async with semaphore:
+                try:
+                    result = await self.agenerate_questions(texts[idx], num_questions)
+                except Exception as e:
+                    print(f"Error generating questions for chunk {idx}: {e}")
+                    # Continue with other texts even if this one fails
+                    return idx, None
+
+            if not _is_questions_result(result):
+                print(f"Unexpected response shape for chunk {idx}, skipping")
+                return idx, None
+
+            # Only cache usable results, so a bad response is retried next run
+            if result["questions"]:
+                await asyncio.to_thread(response_cache.put, cache_keys[idx], result)
+            return idx, result
+
+        misses = [idx for idx, result in enumerate(cached) if not _is_questions_result(result)]
+
+        # Longest first; tasks start in creation order and the semaphore
+        # queues waiters FIFO, so LLM slots are taken in this order
+        misses.sort(key=lambda idx: len(texts[idx]), reverse=True)
+        tasks = [asyncio.create_task(generate_one(idx)) for idx in misses]
+
+        try:
+            for idx, result in enumerate(cached):
+                if _is_questions_result(result):
+                    await handle_result(idx, result)
+
+            for future in asyncio.as_completed(tasks):
+                idx, result = await future
+                await handle_result(idx, result)
+        finally:
+            # Don't leave LLM calls running if the batch is abandoned
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        return results
+
+    async def agenerate_questions(
         self,
         text: str,
         num_questions: int = None
@@ -57,6 +223,9 @@ class LLMService:
         """
         Generate questions from text using LLM.
 
+        API providers are called asynchronously so several chunks can be in
+        flight at once; MLX runs on its dedicated thread, one call at a time.
+
         Args:
             text: Source text
             num_questions: Number of questions to generate
@@ -71,59 +240,43 @@ class LLMService:
         user_prompt = get_question_generation_prompt(text, num_questions)
         system_prompt = get_system_prompt()
 
-        # Combine prompts for instruction-tuned models
-        full_prompt = f"""<|system|>
-{system_prompt}
-<|user|>
-{user_prompt}
-<|assistant|>
-"""
+        full_prompt = self._format_prompt(system_prompt, user_prompt)
 
         # Generate response based on provider
         if self.provider == "mlx":
-            response = self._generate_mlx(full_prompt)
+            response = await asyncio.get_running_loop().run_in_executor(
+                self._mlx_executor,
+                self._generate_mlx,
+                full_prompt
+            )
         elif self.provider == "ollama":
-            response = self._generate_ollama(full_prompt)
+            response = await self._generate_ollama(full_prompt)
         elif self.provider == "openai":
-            response = self._generate_openai(user_prompt, system_prompt)
+            response = await self._generate_openai(user_prompt, system_prompt)
         else:
             raise ValueError(f"Unsupported provider: {self.provider}")
 
-        # Parse JSON response
+        return self._parse_response(response)
+
+    @staticmethod
+    def _parse_response(response: str) -> Dict[str, Any]:
+        """
+        Parse the JSON object out of a raw LLM response.
+
+        Args:
+            response: Raw model output
+
+        Returns:
+            Parsed questions data
+        """
         try:
-            # Clean response - remove markdown code blocks if present
-            response = response.strip()
-            if response.startswith("```json"):
-                response = response[7:]
-            if response.startswith("```"):
-                response = response[3:]
-            if response.endswith("```"):
-                response = response[:-3]
-            response = response.strip()
-
-            # Try to find valid JSON by looking for the questions array structure
-            # Method 1: Find complete JSON object
+            # Clean response - remove markdown code fences if present
+            response = _FENCE_RE.sub('', response)
+
+            # Decode the first JSON object; raw_decode stops at its end, so
+            # any trailing text after the object is ignored
             json_start = response.find('{')
-            if json_start > 0:
-                response = response[json_start:]
-
-            # Method 2: Find the last complete closing brace for the main object
-            # Count braces to find where the JSON actually ends
-            brace_count = 0
-            json_end = -1
-            for i, char in enumerate(response):
-                if char == '{':
-                    brace_count += 1
-                elif char == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        json_end = i
-                        break
-
-            if json_end != -1:
-                response = response[:json_end + 1]
-
-            questions_data = json.loads(response)
+            questions_data, _ = _json_decoder.raw_decode(response, max(json_start, 0))
             return questions_data
         except json.JSONDecodeError as e:
             print(f"Failed to parse JSON response: {e}")
@@ -138,20 +291,34 @@ class LLMService:
             self.load_model()
 
         try:
-            # MLX uses a sampler for temperature control
-            from mlx_lm.sample_utils import make_sampler
+            import mlx_lm
 
-            sampler = make_sampler(
-                temp=settings.mlx_temperature,
-                top_p=0.95
-            )
+            if self._prefix_cache is not None:
+                tokens = self.tokenizer.encode(prompt)
+                prefix_length = len(self._prefix_tokens)
+
+                # Only reuse the cache if the prompt tokenizes with the same prefix
+                if tokens[:prefix_length] == self._prefix_tokens:
+                    try:
+                        return mlx_lm.generate(
+                            self.model,
+                            self.tokenizer,
+                            prompt=tokens[prefix_length:],
+                            max_tokens=settings.mlx_max_tokens,
+                            sampler=self._sampler,
+                            prompt_cache=copy.deepcopy(self._prefix_cache),
+                            verbose=False
+                        )
+                    except Exception as e:
+                        print(f"Cached-prefix generation failed, using full prefill: {e}")
+                        self._prefix_cache = None
 
             response = mlx_lm.generate(
                 self.model,
                 self.tokenizer,
                 prompt=prompt,
                 max_tokens=settings.mlx_max_tokens,
-                sampler=sampler,
+                sampler=self._sampler,
                 verbose=False
             )
             return response
@@ -159,13 +326,18 @@ class LLMService:
             print(f"MLX generation error: {e}")
             raise
 
-    def _generate_ollama(self, prompt: str) -> str:
+    async def _generate_ollama(self, prompt: str) -> str:
         """Generate response using Ollama API."""
-        import requests
-
         try:
-            response = requests.post(
-                f"{settings.ollama_base_url}/api/generate",
+            if self._ollama_client is None:
+                self._ollama_client = httpx.AsyncClient(
+                    base_url=settings.ollama_base_url,
+                    timeout=httpx.Timeout(600.0),
+                    limits=httpx.Limits(max_connections=32, max_keepalive_connections=32)
+                )
+
+            response = await self._ollama_client.post(
+                "/api/generate",
                 json={
                     "model": settings.model_name,
                     "prompt": prompt,
@@ -182,13 +354,14 @@ class LLMService:
             print(f"Ollama generation error: {e}")
             raise
 
-    def _generate_openai(self, user_prompt: str, system_prompt: str) -> str:
+    async def _generate_openai(self, user_prompt: str, system_prompt: str) -> str:
         """Generate response using OpenAI API."""
         try:
-            from openai import OpenAI
-            client = OpenAI(api_key=settings.openai_api_key)
+            if self._openai_client is None:
+                from openai import AsyncOpenAI
+                self._openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
 
-            response = client.chat.completions.create(
+            response = await self._openai_client.chat.completions.create(
                 model=settings.model_name,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -202,6 +375,15 @@ class LLMService:
             print(f"OpenAI generation error: {e}")
             raise
 
+    async def aclose(self):
+        """Close pooled HTTP connections."""
+        if self._ollama_client is not None:
+            await self._ollama_client.aclose()
+            self._ollama_client = None
+        if self._openai_client is not None:
+            await self._openai_client.close()
+            self._openai_client = None
+
 
 # Global instance
 llm_service = LLMService()
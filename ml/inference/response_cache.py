@@ -0,0 +1,164 @@
+"""On-disk cache of LLM responses keyed by chunk content."""
+import os
+import hashlib
+import tempfile
+import threading
+from typing import Optional, Dict, Any, List
+import orjson
+from backend.config import settings
+from ml.prompts import PROMPT_VERSION
+
+
+class ResponseCache:
+    """
+    Content-addressed cache of parsed LLM results.
+
+    Entries are stored as <sha256>.json files, keyed by provider, model,
+    prompt version, question count and chunk text, so changing any of them
+    misses the cache. Reads refresh an entry's mtime; once the directory
+    grows past the byte budget, the least recently used entries are evicted.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether caching is enabled."""
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(text: str, num_questions: int) -> str:
+        """
+        Build the cache key for a chunk.
+
+        Args:
+            text: Chunk text
+            num_questions: Number of questions requested
+
+        Returns:
+            Hex digest identifying the request
+        """
+        return hashlib.sha256(
+            f"{settings.llm_provider}|{settings.model_name}|{PROMPT_VERSION}|{num_questions}|{text}".encode('utf-8')
+        ).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result.
+
+        Args:
+            key: Cache key from key()
+
+        Returns:
+            Cached result or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = orjson.loads(f.read())
+            # Mark as recently used for eviction
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            return None
+        except (OSError, orjson.JSONDecodeError) as e:
+            print(f"Ignoring unreadable cache entry {key}: {e}")
+            return None
+
+    def get_many(self, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Look up several cached results.
+
+        Args:
+            keys: Cache keys from key()
+
+        Returns:
+            Cached results in key order (None for misses)
+        """
+        return [self.get(key) for key in keys]
+
+    def put(self, key: str, data: Dict[str, Any]):
+        """
+        Store a result, replacing any existing entry atomically.
+
+        Args:
+            key: Cache key from key()
+            data: Parsed LLM result
+        """
+        if not self.enabled:
+            return
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            content = orjson.dumps(data)
+
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(content)
+                os.replace(tmp_path, self._path(key))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+            with self._lock:
+                if self._size is None:
+                    self._size = self._scan_size()
+                else:
+                    self._size += len(content)
+
+                if self._size > self.max_bytes:
+                    self._evict()
+        except Exception as e:
+            print(f"Failed to write cache entry {key}: {e}")
+
+    def _entries(self):
+        """List cache entries as (mtime, size, path)."""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _scan_size(self) -> int:
+        """Total size of all cache entries."""
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """Delete least recently used entries down to 90% of the budget."""
+        entries = sorted(self._entries())
+        size = sum(entry_size for _, entry_size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+
+        self._size = size
+
+
+# Global instance
+response_cache = ResponseCache(
+    os.path.join(settings.generated_questions_dir, ".cache"),
+    settings.response_cache_max_mb * 1024 * 1024
+)
@@ -1,4 +1,4 @@
 """Prompts module."""
-from .question_templates import get_question_generation_prompt, get_system_prompt
+from .question_templates import PROMPT_VERSION, get_question_generation_prompt, get_system_prompt
 
-__all__ = ["get_question_generation_prompt", "get_system_prompt"]
+__all__ = ["PROMPT_VERSION", "get_question_generation_prompt", "get_system_prompt"]
@@ -1,4 +1,9 @@
 """Question generation prompt templates."""
+import string
+from functools import lru_cache
+
+# Bump whenever the prompts change so cached LLM responses are not reused
+PROMPT_VERSION = "1"
 
 SYSTEM_PROMPT = """You are an expert educational content creator specializing in generating high-quality assessment questions from text content. Your task is to analyze the given text and create clear, accurate, and pedagogically sound questions."""
 
@@ -56,6 +61,13 @@ Return ONLY a valid JSON object in this exact structure (no additional text):
 
 Remember: Return ONLY the JSON object, no markdown formatting, no code blocks, no additional text."""
 
+# Template parsed once into (literal_text, field_name) pairs, so building a
+# prompt is a plain string join instead of re-parsing the format string
+_PROMPT_PARTS = [
+    (literal_text, field_name)
+    for literal_text, field_name, _, _ in string.Formatter().parse(QUESTION_GENERATION_PROMPT)
+]
+
 
 def get_question_generation_prompt(text: str, num_questions: int = 5) -> str:
     """
@@ -68,12 +80,14 @@ def get_question_generation_prompt(text: str, num_questions: int = 5) -> str:
     Returns:
         Formatted prompt string
     """
-    return QUESTION_GENERATION_PROMPT.format(
-        text=text,
-        num_questions=num_questions
+    fields = {"text": text, "num_questions": str(num_questions)}
+    return "".join(
+        literal_text + fields[field_name] if field_name else literal_text
+        for literal_text, field_name in _PROMPT_PARTS
     )
 
 
+@lru_cache(maxsize=1)
 def get_system_prompt() -> str:
     """Get the system prompt."""
     return SYSTEM_PROMPT